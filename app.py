@@ -1,15 +1,35 @@
-from flask import Flask, render_template, request, redirect, url_for, session
-from google import genai
-from PIL import Image
+from __future__ import annotations
+
+from quart import Quart, render_template, request, redirect, url_for, session
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+import asyncio
 import io
+import os
 import re
+import struct
+import json
 import base64
 
-# Initialize Flask App
-app = Flask(__name__)
+# PIL and google.genai are imported on first use (see get_client and load_and_optimize),
+# so a cold start that only serves the upload page doesn't load the AI/imaging stack.
+if TYPE_CHECKING:
+    from google.genai import types
+    from PIL import Image
+
+# Initialize Quart App (async drop-in for Flask, so one worker can serve many
+# concurrent analyses while they wait on the Gemini API)
+app = Quart(__name__)
+
+# Quart defaults to a 16 MiB request limit and a 60s body timeout; Flask had neither.
+# Multi-photo and bulk uploads of phone images easily pass 16 MiB, and slow mobile links
+# need longer than 60s to send them, so both are set deliberately here.
+MAX_UPLOAD_MB = 200
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_MB * 1024 * 1024
+app.config['BODY_TIMEOUT'] = 600 # seconds
 # ----------------------------------------------------------------------------------
-# CRITICAL SECURITY STEP: SETTING THE FLASK SECRET KEY
-# This is necessary because the text analysis result is stored in the session.
+# CRITICAL SECURITY STEP: SETTING THE APP SECRET KEY
+# This is necessary because the bulk scan job name is stored in the session.
 app.secret_key = 'TuberCheck-AI-Secret-Key-76vbnmklo987jklpoiuytredfghjkl0987' 
 # ----------------------------------------------------------------------------------
 
@@ -17,12 +37,88 @@ app.secret_key = 'TuberCheck-AI-Secret-Key-76vbnmklo987jklpoiuytredfghjkl0987'
 
 # --- Gemini Configuration ---
 client = None
-try:
-    # Client Initialization. Vercel automatically finds the GEMINI_API_KEY environment variable.
-    client = genai.Client()
-except Exception as e:
-    print(f"Error initializing Gemini client: {e}")
-    client = None
+client_initialized = False
+
+def get_client():
+    """
+    Returns the shared Gemini client, creating it (and importing google.genai) on the
+    first call in this process. Returns None if initialization failed.
+    """
+    global client, client_initialized
+    if client_initialized:
+        return client
+    client_initialized = True
+    
+    try:
+        from google import genai
+        from google.genai import types
+        import httpx
+        
+        # Client Initialization. Vercel automatically finds the GEMINI_API_KEY environment variable.
+        # One shared client per process: its HTTP/2 keep-alive pool lets warm requests skip the
+        # TCP + TLS handshake to the Gemini API. The async pool is passed in as a ready httpx client
+        # because async_client_args would go to aiohttp instead whenever aiohttp is installed.
+        pool_limits = httpx.Limits(max_keepalive_connections=32)
+        client = genai.Client(
+            http_options=types.HttpOptions(
+                client_args={'http2': True, 'limits': pool_limits},
+                httpx_async_client=httpx.AsyncClient(http2=True, limits=pool_limits),
+            )
+        )
+    except Exception as e:
+        print(f"Error initializing Gemini client: {e}")
+        client = None
+    return client
+
+# Model used for both interactive and bulk (Batch API) analysis
+GEMINI_MODEL = 'gemini-2.5-flash'
+
+# Service tier for the interactive call. 'flex' is billed at half the Standard price;
+# set GEMINI_TIER=standard (or priority) for latency-critical deployments.
+# Checked at import like RESAMPLE_FILTER, so a typo fails the deploy instead of every analysis.
+GEMINI_TIERS = {'flex', 'standard', 'priority'}
+GEMINI_TIER = os.environ.get('GEMINI_TIER', 'flex').lower()
+if GEMINI_TIER not in GEMINI_TIERS:
+    raise ValueError(
+        f"Invalid GEMINI_TIER {GEMINI_TIER!r}; expected one of {', '.join(sorted(GEMINI_TIERS))}."
+    )
+
+# Batch job states reported by client.batches.get
+BATCH_DONE_STATES = {'JOB_STATE_SUCCEEDED', 'JOB_STATE_FAILED', 'JOB_STATE_CANCELLED', 'JOB_STATE_EXPIRED'}
+
+# 768px fits a single Gemini vision tile, which keeps billed image tokens down
+MAX_SIZE = (768, 768)
+
+# JPEG start-of-frame markers, which carry the image size (C4, C8 and CC are not frames)
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# Frame types safe to forward untouched: Huffman-coded baseline, extended and progressive.
+# Lossless, hierarchical and arithmetic-coded JPEGs are re-encoded by optimize_image instead.
+JPEG_PASSTHROUGH_MARKERS = {0xC0, 0xC1, 0xC2}
+
+# Downsampling filter for optimize_image. HAMMING (or BICUBIC) is noticeably faster than
+# LANCZOS and the difference is invisible to the model at these sizes.
+# The name is checked here, at import, so a typo fails the deploy instead of every upload.
+RESAMPLE_FILTERS = {'NEAREST', 'BOX', 'BILINEAR', 'HAMMING', 'BICUBIC', 'LANCZOS'}
+RESAMPLE_FILTER = os.environ.get('RESAMPLE_FILTER', 'HAMMING').upper()
+if RESAMPLE_FILTER not in RESAMPLE_FILTERS:
+    raise ValueError(
+        f"Invalid RESAMPLE_FILTER {RESAMPLE_FILTER!r}; expected one of {', '.join(sorted(RESAMPLE_FILTERS))}."
+    )
+
+# Leading bytes (magic numbers) of the image formats PIL decodes for uploads: JPEG, PNG,
+# GIF, BMP and TIFF. WebP ('RIFF....WEBP') is checked separately. Anything else is
+# rejected before it is read.
+IMAGE_SIGNATURES = (
+    b'\xff\xd8\xff', # JPEG
+    b'\x89PNG', # PNG
+    b'GIF87a', b'GIF89a', # GIF
+    b'BM', # BMP
+    b'II*\x00', b'MM\x00*', # TIFF (little/big endian)
+)
+
+# Worker pool for decode + resize. PIL releases the GIL inside libjpeg and the resize
+# kernels, so images from a multi-photo upload are processed in parallel.
+image_executor = ThreadPoolExecutor(max_workers=8)
 
 # --- Gemini Prompt (Updated to look for both Crown Gall and Leafy Gall) ---
 GALL_ANALYSIS_PROMPT = """
@@ -36,69 +132,359 @@ Crucially, format your final verdict on a single line using ONLY this exact stru
 """
 # -----------------------------
 
+# --- Response cleanup patterns (compiled once at import) ---
+_HTML_TAG = re.compile(r'<[^>]+>')
+_VERDICT = re.compile(r'\[VERDICT:.*?\]\s*\[CONFIDENCE:.*?%\]', re.DOTALL)
+# Numbered headings and the "Provide a Verdict" header are both dropped, so they share one
+# pass. Bolded headings stay a separate, later pass: a lazy bold match starting at an
+# earlier ** could otherwise run across either marker on the same line.
+_DROPPED_HEADER = re.compile(r'^\d+\.\s+\*\*.*?\*\*:\s*|\*\*Provide a Verdict\*\*:\s*', re.MULTILINE)
+_BOLD_HEADER = re.compile(r'\*\*(.*?)\*\*:\s*', re.MULTILINE)
+
 def optimize_image(image: Image.Image) -> Image.Image:
     """
     Resizes and compresses the image for the Gemini API call. 
     This is necessary to stay within API payload limits and prevent Vercel memory/timeout issues.
     """
-    # Max size remains safe for the AI API payload
-    MAX_SIZE = (800, 800) 
+    from PIL import Image
+    
+    resample = getattr(Image.Resampling, RESAMPLE_FILTER)
     
-    # Resize the image if necessary
+    # Resize the image if necessary. Images already within MAX_SIZE skip draft() and
+    # resampling entirely, and their pixels stay undecoded until they are encoded.
     if image.width > MAX_SIZE[0] or image.height > MAX_SIZE[1]:
-        # Use LANCZOS for high-quality downsampling
-        image.thumbnail(MAX_SIZE, Image.Resampling.LANCZOS)
+        # For JPEGs, let libjpeg decode directly at 1/2, 1/4 or 1/8 scale (still >= MAX_SIZE).
+        # This must happen on the freshly opened image, before anything decodes the pixels.
+        if image.format == 'JPEG':
+            image.draft('RGB', MAX_SIZE)
+        
+        # Downsample with the configured filter (HAMMING by default)
+        image.thumbnail(MAX_SIZE, resample)
     
-    # Convert image format to RGB (JPEG) for predictable compression if needed
-    if image.mode in ('RGBA', 'P', 'LA'):
+    # Convert image format to RGB (JPEG) for predictable compression if needed.
+    # Every image is JPEG-encoded before upload, so anything other than RGB or L is converted.
+    # Already-RGB images skip this too, so a small RGB image is returned untouched.
+    if image.mode not in ('RGB', 'L'):
         image = image.convert('RGB')
         
     return image
 
 
-# The image_to_base64 function is no longer needed since we are not displaying the uploaded image.
+def load_and_optimize(stream) -> Image.Image:
+    """
+    Decodes the upload stream and optimizes the image. This is CPU-bound PIL work,
+    so it is run on image_executor to keep the event loop free.
+    """
+    from PIL import Image
+    
+    # PIL pulls bytes from the upload stream on demand (no BytesIO copy); pixels are only
+    # decoded once draft() and thumbnail() in optimize_image have set the target scale.
+    # Any remaining decode happens in image_to_jpeg, still on this worker thread.
+    original_img = Image.open(stream)
+    return optimize_image(original_img)
+
+
+def image_to_jpeg(image: Image.Image) -> bytes:
+    """
+    Encodes an optimized image as a compact JPEG. The SDK would otherwise re-encode PIL
+    images itself, as much larger PNGs.
+    """
+    buf = io.BytesIO()
+    image.save(buf, format='JPEG', quality=85, optimize=True, progressive=True)
+    return buf.getvalue()
+
+
+def peek_jpeg_frame(stream):
+    """
+    Reads (marker, precision, width, height, components) from a JPEG's start-of-frame header
+    by walking the marker segments, without decoding anything. Returns None if the stream isn't a JPEG
+    or no frame header is found. The stream is always rewound.
+    """
+    try:
+        if stream.read(2) != b'\xff\xd8':
+            return None
+        
+        while True:
+            marker = stream.read(2)
+            if len(marker) < 2 or marker[0] != 0xFF:
+                return None
+            # Skip fill bytes (0xFF padding before the marker code)
+            while marker[1] == 0xFF:
+                marker = marker[1:] + stream.read(1)
+                if len(marker) < 2:
+                    return None
+            
+            code = marker[1]
+            if code == 0x01 or 0xD0 <= code <= 0xD7:
+                continue # Standalone markers have no length field
+            if code in (0xD9, 0xDA):
+                return None # End of image / start of scan before any frame header
+            
+            (length,) = struct.unpack('>H', stream.read(2))
+            if code in JPEG_SOF_MARKERS:
+                precision, height, width, components = struct.unpack('>BHHB', stream.read(6))
+                return code, precision, width, height, components
+            stream.seek(length - 2, io.SEEK_CUR)
+    
+    except struct.error:
+        return None
+    finally:
+        stream.seek(0) # IMPORTANT: Reset stream pointer
+
+
+def load_as_jpeg(stream) -> bytes:
+    """
+    Returns JPEG bytes for one upload. An 8-bit baseline/extended/progressive JPEG that
+    already fits within MAX_SIZE and is grayscale or RGB is forwarded as-is, skipping the
+    PIL decode and re-encode entirely; anything else goes through optimize_image.
+    """
+    frame = peek_jpeg_frame(stream)
+    if frame:
+        marker, precision, width, height, components = frame
+        if (marker in JPEG_PASSTHROUGH_MARKERS and precision == 8
+                and width <= MAX_SIZE[0] and height <= MAX_SIZE[1] and components in (1, 3)):
+            return stream.read()
+    
+    return image_to_jpeg(load_and_optimize(stream))
+
+
+def load_as_part(stream) -> types.Part:
+    """
+    Prepares one upload as a JPEG Part for the interactive call.
+    """
+    from google.genai import types
+    
+    return types.Part.from_bytes(data=load_as_jpeg(stream), mime_type='image/jpeg')
+
+
+def is_image_upload(file) -> bool:
+    """
+    Cheap pre-check on the first 12 bytes (magic number), so PDFs, videos and other
+    non-images are skipped without reading the whole upload. The browser-declared
+    mimetype is not trusted: real photos often arrive as application/octet-stream.
+    """
+    head = file.stream.read(12)
+    file.stream.seek(0) # IMPORTANT: Reset stream pointer
+    return (
+        head.startswith(IMAGE_SIGNATURES)
+        or (head[:4] == b'RIFF' and head[8:12] == b'WEBP') # WebP
+    )
+
+
+async def process_uploads(uploaded_files, process) -> list:
+    """
+    Runs `process` on the stream of every uploaded file in parallel on image_executor.
+    Each worker gets its own file's stream, so no stream is shared between threads.
+    Returns (file name, result) pairs in upload order, skipping non-images and files
+    that fail to process.
+    """
+    image_files = []
+    for file in uploaded_files:
+        if file.filename == '':
+            continue
+        file.stream.seek(0) # IMPORTANT: Reset stream pointer
+        if not is_image_upload(file):
+            print(f"Skipping non-image file: {file.filename} ({file.mimetype})")
+            continue
+        image_files.append(file)
+    
+    loop = asyncio.get_running_loop()
+    outcomes = await asyncio.gather(
+        *(loop.run_in_executor(image_executor, process, file.stream) for file in image_files),
+        return_exceptions=True
+    )
+    
+    processed = []
+    for file, outcome in zip(image_files, outcomes):
+        if isinstance(outcome, Exception):
+            print(f"Skipping non-image file or failed to process: {file.filename}. Error: {outcome}")
+            continue
+        processed.append((file.filename, outcome))
+    return processed
+
+
+def format_analysis(analysis_text: str) -> str:
+    """
+    Cleans up the raw model response and combines the verdict line and the
+    formatted findings into the single string results.html expects.
+    """
+    # 1. FIX: Use regex to remove ANY HTML tag (like <strong>, <b>, <em>) from the text.
+    analysis_text = _HTML_TAG.sub('', analysis_text)
+
+    # 2-3. Extract the verdict line separately (first one wins) while removing every verdict
+    # and surrounding newlines from the rest of the text, in the same pass.
+    verdicts = []
+
+    def _take_verdict(match: re.Match) -> str:
+        verdicts.append(match.group(0))
+        return ''
+
+    clean_analysis = _VERDICT.sub(_take_verdict, analysis_text).strip()
+    verdict_line = verdicts[0].strip() if verdicts else "[VERDICT: Error] [CONFIDENCE: 0%]"
+    
+    # 4-5a. Remove the old numbered list markers and headings (1. **, 2. **, etc.) - Safeguard -
+    # and the unwanted "Provide a Verdict:" header completely if it appears.
+    clean_analysis = _DROPPED_HEADER.sub('', clean_analysis).strip()
+    
+    # 5b. Convert all remaining bolded headers (Identify Growths, Describe Findings) to H4 tags for styling
+    clean_analysis = _BOLD_HEADER.sub(r'<h4>\1</h4>\n', clean_analysis).strip()
+    
+    # 6. Use double newlines to separate sections clearly and collapse multiple newlines.
+    # split/join drops the empty strings between consecutive newlines in one C-level pass.
+    clean_analysis = '\n\n'.join(filter(None, clean_analysis.split('\n'))).strip()
+    
+    # 7. Combine verdict and cleaned analysis with a unique separator for Jinja to split
+    return f"{verdict_line}---SEPARATOR---{clean_analysis}"
+
+
+async def generate_analysis(content: list):
+    """
+    Calls the Gemini API on the configured service tier, falling back to the
+    Standard tier if the cheaper tier is out of capacity (HTTP 429).
+    """
+    from google.genai import errors
+    
+    client = get_client()
+    try:
+        return await client.aio.models.generate_content(
+            model=GEMINI_MODEL,
+            contents=content,
+            config={'service_tier': GEMINI_TIER}
+        )
+    except errors.ClientError as e:
+        if e.code != 429 or GEMINI_TIER == 'standard':
+            raise
+        print(f"Service tier '{GEMINI_TIER}' exhausted, retrying on standard. Error: {e}")
+        return await client.aio.models.generate_content(
+            model=GEMINI_MODEL,
+            contents=content,
+            config={'service_tier': 'standard'}
+        )
+
+
+def load_as_base64(stream) -> str:
+    """
+    Prepares one upload as base64 JPEG for inline use in a Batch API request line.
+    """
+    return base64.b64encode(load_as_jpeg(stream)).decode('ascii')
+
+
+def build_batch_line(index: int, file_name: str, image_base64: str) -> str:
+    """
+    Builds one JSONL line for the Batch API: the analysis prompt plus a single image.
+    The key is "<upload index>-<file name>": file names repeat (iOS names every library
+    photo image.jpg) and output lines come back in no particular order, so the index is
+    what matches each result to its upload.
+    """
+    line = {
+        'key': f"{index}-{file_name}",
+        'request': {
+            'contents': [{
+                'role': 'user',
+                'parts': [
+                    {'text': GALL_ANALYSIS_PROMPT},
+                    {'inline_data': {'mime_type': 'image/jpeg', 'data': image_base64}},
+                ],
+            }],
+        },
+    }
+    return json.dumps(line)
+
+
+def parse_batch_results(jsonl: str) -> list:
+    """
+    Parses the downloaded Batch API output file into (photo number, file name, formatted
+    result) triples, sorted back into upload order.
+    """
+    parsed = []
+    for raw_line in jsonl.splitlines():
+        if not raw_line.strip():
+            continue
+        line = json.loads(raw_line)
+        
+        # Split the "<upload index>-<file name>" key written by build_batch_line
+        key = line.get('key', '')
+        index, _, file_name = key.partition('-')
+        if index.isdigit():
+            index = int(index)
+        else:
+            index, file_name = None, key
+        file_name = file_name or 'Unknown image'
+        
+        try:
+            parts = line['response']['candidates'][0]['content']['parts']
+            analysis_text = ''.join(part.get('text', '') for part in parts)
+            result = format_analysis(analysis_text)
+        except (KeyError, IndexError, TypeError):
+            error_message = f"Critical Error during AI Analysis: {line.get('error', 'No response returned for this image.')}"
+            result = f"[VERDICT: Error] [CONFIDENCE: 0%]---SEPARATOR---{error_message}"
+        parsed.append((index, file_name, result))
+    
+    # Lines without a readable index go last
+    parsed.sort(key=lambda item: (item[0] is None, item[0] or 0))
+    return [
+        (index + 1 if index is not None else None, file_name, result)
+        for index, file_name, result in parsed
+    ]
+
+
+async def render_result(final_result: str):
+    """
+    Renders results.html for an analysis result. /analyze responds with this directly,
+    saving the browser a redirect round trip to /results.
+    """
+    # CRITICAL FIX: analyzed_image is always None now, as we stopped storing it to ensure stability.
+    analyzed_image_base64 = None 
+    
+    # We no longer need to check for the [IMAGE_TOO_LARGE] flag.
+    
+    return await render_template('results.html', 
+                           result=final_result,
+                           analyzed_image=analyzed_image_base64,
+                           # Pass a simple flag to show a message about the image not being displayed
+                           display_skipped=True)
+
+
+@app.errorhandler(413)
+async def upload_too_large(error):
+    """
+    Shows a readable verdict page instead of a bare 413 when an upload exceeds MAX_CONTENT_LENGTH.
+    """
+    error_message = f"Upload too large: the photos together exceed the {MAX_UPLOAD_MB} MB limit. Please upload fewer or smaller images."
+    return await render_result(f"[VERDICT: Error] [CONFIDENCE: 0%]---SEPARATOR---{error_message}"), 413
+
 
 @app.route('/')
-def index():
+async def index():
     """Renders the main upload page (index.html)."""
-    return render_template('index.html')
+    return await render_template('index.html')
 
 
 @app.route('/analyze', methods=['POST'])
-def analyze_tuber():
+async def analyze_tuber():
     """
     Handles the image upload, optimizes the image for AI, calls the Gemini API, 
-    and redirects to the results page, skipping image storage in session.
+    and renders the results page directly in the response.
     """
     # Check 1: AI Service Check
+    client = get_client()
     if not client:
         error_msg = "[VERDICT: Error] [CONFIDENCE: 0%]---SEPARATOR---Critical Error: AI service not configured. Check GEMINI_API_KEY."
-        session['analysis_result'] = error_msg
-        return redirect(url_for('results'))
+        return await render_result(error_msg)
     
     # Check 2: File Upload Check
-    if 'photos' not in request.files or not request.files.getlist('photos'):
+    files = await request.files
+    if 'photos' not in files or not files.getlist('photos'):
         return redirect(url_for('index'))
 
-    uploaded_files = request.files.getlist('photos')
+    uploaded_files = files.getlist('photos')
     
     # --- 1. Prepare Content for Gemini API ---
     content = [GALL_ANALYSIS_PROMPT]
     
-    for file in uploaded_files:
-        if file.filename != '':
-            try:
-                file.stream.seek(0) # IMPORTANT: Reset stream pointer
-                img_stream = io.BytesIO(file.read())
-                original_img = Image.open(img_stream)
-                
-                # Optimize image size for API only
-                optimized_img = optimize_image(original_img)
-                content.append(optimized_img)
-                
-            except Exception as e:
-                print(f"Skipping non-image file or failed to process: {file.filename}. Error: {e}")
-                continue
+    # Decode, optimize and JPEG-encode images for API only (in parallel, off the event loop)
+    for _, image_part in await process_uploads(uploaded_files, load_as_part):
+        content.append(image_part)
 
     if len(content) == 1: # Only the prompt, no usable images
         return redirect(url_for('index'))
@@ -108,69 +494,115 @@ def analyze_tuber():
     
     # --- 2. Call the Gemini API ---
     try:
-        response = client.models.generate_content(
-            model='gemini-2.5-flash',
-            contents=content
-        )
-        analysis_text = response.text
-        
-        # --- START RESPONSE CLEANUP AND FORMATTING ---
-        # 1. FIX: Use regex to remove ANY HTML tag (like <strong>, <b>, <em>) from the text.
-        analysis_text = re.sub(r'<[^>]+>', '', analysis_text)
-
-        # 2. Extract the verdict line separately.
-        verdict_match = re.search(r'\[VERDICT:.*?\]\s*\[CONFIDENCE:.*?%\]', analysis_text, re.DOTALL)
-        verdict_line = verdict_match.group(0).strip() if verdict_match else "[VERDICT: Error] [CONFIDENCE: 0%]"
-        
-        # 3. Remove verdict and surrounding newlines from the rest of the text
-        clean_analysis = re.sub(r'\[VERDICT:.*?\]\s*\[CONFIDENCE:.*?%\]', '', analysis_text, flags=re.DOTALL).strip()
-        
-        # 4. Remove the old numbered list markers and headings (1. **, 2. **, 3. **, etc.) - Safeguard
-        clean_analysis = re.sub(r'^\d+\.\s+\*\*.*?\*\*:\s*', '', clean_analysis, flags=re.MULTILINE).strip()
-        
-        # 5. CONVERT BOLDED HEADINGS TO H4 TAGS, but exclude "Provide a Verdict"
-        # 5a. Remove the unwanted "Provide a Verdict:" header completely if it appears.
-        clean_analysis = re.sub(r'\*\*Provide a Verdict\*\*:\s*', '', clean_analysis, flags=re.MULTILINE).strip()
-        
-        # 5b. Convert all remaining bolded headers (Identify Growths, Describe Findings) to H4 tags for styling
-        clean_analysis = re.sub(r'\*\*(.*?)\*\*:\s*', r'<h4>\1</h4>\n', clean_analysis, flags=re.MULTILINE).strip()
-        
-        # 6. Use double newlines to separate sections clearly and collapse multiple newlines/spaces
-        clean_analysis = re.sub(r'\n+', '\n\n', clean_analysis).strip()
-        
-        # 7. Combine verdict and cleaned analysis with a unique separator for Jinja to split
-        final_result = f"{verdict_line}---SEPARATOR---{clean_analysis}"
-        
-        # --- END RESPONSE CLEANUP AND FORMATTING ---
+        # Uses the SDK's async client so the worker is free while the model responds
+        response = await generate_analysis(content)
+        final_result = format_analysis(response.text)
 
-        # Store the analysis result in the session
-        session['analysis_result'] = final_result
-        return redirect(url_for('results'))
+        # Render the results in this response; nothing needs to be stored for a redirect
+        return await render_result(final_result)
         
     except Exception as e:
         error_message = f"Critical Error during AI Analysis: {type(e).__name__}: {str(e)}. This may indicate a network issue or an API rate limit. Please try again."
         print(error_message)
-        session['analysis_result'] = f"[VERDICT: Error] [CONFIDENCE: 0%]---SEPARATOR---{error_message}"
-        return redirect(url_for('results'))
+        return await render_result(f"[VERDICT: Error] [CONFIDENCE: 0%]---SEPARATOR---{error_message}")
+
+
+@app.route('/analyze_batch', methods=['POST'])
+async def analyze_batch():
+    """
+    Bulk scan path: submits one Batch API request per uploaded image (half the token
+    cost of the interactive call, results within 24h) and redirects to the status page.
+    The interactive /analyze route remains the path for single-image use.
+    """
+    # Check 1: AI Service Check
+    client = get_client()
+    if not client:
+        error_msg = "Critical Error: AI service not configured. Check GEMINI_API_KEY."
+        return await render_template('batch_status.html', state='JOB_STATE_FAILED', error=error_msg)
+
+    # Check 2: File Upload Check
+    files = await request.files
+    if 'photos' not in files or not files.getlist('photos'):
+        return redirect(url_for('index'))
+
+    # --- 1. Write one JSONL request line per image ---
+    batch_lines = [
+        build_batch_line(index, file_name, image_base64)
+        for index, (file_name, image_base64) in enumerate(
+            await process_uploads(files.getlist('photos'), load_as_base64)
+        )
+    ]
+
+    if not batch_lines: # No usable images
+        return redirect(url_for('index'))
+
+    # --- 2. Upload the JSONL and create the batch job ---
+    try:
+        jsonl = io.BytesIO('\n'.join(batch_lines).encode('utf-8'))
+        uploaded = await client.aio.files.upload(
+            file=jsonl,
+            config={'display_name': 'tubercheck-batch', 'mime_type': 'jsonl'}
+        )
+        batch_job = await client.aio.batches.create(
+            model=GEMINI_MODEL,
+            src={'file_name': uploaded.name},
+            config={'display_name': 'tubercheck-batch'}
+        )
+
+    except Exception as e:
+        error_message = f"Critical Error while submitting bulk analysis: {type(e).__name__}: {str(e)}. Please try again."
+        print(error_message)
+        return await render_template('batch_status.html', state='JOB_STATE_FAILED', error=error_message)
+
+    # Only the short job name is kept in the session; results are fetched from the API
+    session['batch_job'] = batch_job.name
+    return redirect(url_for('batch_status', name=batch_job.name))
+
+
+@app.route('/batch_status', defaults={'name': None})
+@app.route('/batch_status/<path:name>')
+async def batch_status(name):
+    """
+    Polls a bulk scan job and renders its results once the Batch API reports success.
+    Without a name, the job stored in the session is used.
+    """
+    name = name or session.get('batch_job')
+    if not name:
+        return redirect(url_for('index'))
+
+    client = get_client()
+    if not client:
+        error_msg = "Critical Error: AI service not configured. Check GEMINI_API_KEY."
+        return await render_template('batch_status.html', name=name, state='JOB_STATE_FAILED', error=error_msg)
+
+    try:
+        batch_job = await client.aio.batches.get(name=name)
+        state = batch_job.state.name
+
+        if state not in BATCH_DONE_STATES:
+            return await render_template('batch_status.html', name=name, state=state)
+
+        if state != 'JOB_STATE_SUCCEEDED':
+            error_message = f"The bulk analysis finished with state {state}: {batch_job.error}"
+            return await render_template('batch_status.html', name=name, state=state, error=error_message)
+
+        output = await client.aio.files.download(file=batch_job.dest.file_name)
+        batch_results = parse_batch_results(output.decode('utf-8'))
+
+    except Exception as e:
+        error_message = f"Critical Error while checking bulk analysis: {type(e).__name__}: {str(e)}. Please try again."
+        print(error_message)
+        return await render_template('batch_status.html', name=name, state='JOB_STATE_FAILED', error=error_message)
+
+    return await render_template('batch_status.html', name=name, state=state, results=batch_results)
 
 
 @app.route('/results')
-def results():
+async def results():
     """
-    Renders the results.html page, displaying analysis and the analyzed image.
+    Renders the results.html page when it is opened directly (e.g. from a bookmark).
+    Analyses are rendered by /analyze itself, so there is no stored result to show here.
     """
-    # Use .pop() to retrieve and immediately remove the data. 
-    default_result = "[VERDICT: Error] [CONFIDENCE: 0%]---SEPARATOR---No analysis data found in session. This can happen if you navigate directly or if the session timed out. Please go back and upload an image."
-    
-    analysis_text = session.pop('analysis_result', default_result)
-    
-    # CRITICAL FIX: analyzed_image is always None now, as we stopped storing it to ensure stability.
-    analyzed_image_base64 = None 
-    
-    # We no longer need to check for the [IMAGE_TOO_LARGE] flag.
+    default_result = "[VERDICT: Error] [CONFIDENCE: 0%]---SEPARATOR---No analysis data found. This can happen if you navigate directly or refresh this page. Please go back and upload an image."
     
-    return render_template('results.html', 
-                           result=analysis_text,
-                           analyzed_image=analyzed_image_base64,
-                           # Pass a simple flag to show a message about the image not being displayed
-                           display_skipped=True)
\ No newline at end of file
+    return await render_result(default_result)
@@ -0,0 +1,34 @@
+"""Regression cases for format_analysis, pinned to the output of the original sequential cleanup passes."""
+import pytest
+
+from app import format_analysis
+
+
+@pytest.mark.parametrize('analysis_text, expected', [
+    # A bold heading must not run across the "Provide a Verdict" header or the verdict line
+    (
+        "**Identify Growths:** A knobby mass is visible. **Provide a Verdict**: [VERDICT: Gall Disease Present] [CONFIDENCE: 80%]",
+        "[VERDICT: Gall Disease Present] [CONFIDENCE: 80%]---SEPARATOR---**Identify Growths:** A knobby mass is visible.",
+    ),
+    # The verdict is removed before headings are converted, so it never ends up inside an <h4>
+    (
+        "**Describe Findings** hard tissue [VERDICT: Gall Disease Present] [CONFIDENCE: 70%] **Note**: check again",
+        "[VERDICT: Gall Disease Present] [CONFIDENCE: 70%]---SEPARATOR---<h4>Describe Findings** hard tissue  **Note</h4>\n\ncheck again",
+    ),
+    # Numbered headings are dropped before the "Provide a Verdict" header
+    (
+        "1. **Identify Growths**: **Provide a Verdict**: none\n2. **Describe Findings**: smooth skin\n[VERDICT: Gall Disease Not Present] [CONFIDENCE: 95%]",
+        "[VERDICT: Gall Disease Not Present] [CONFIDENCE: 95%]---SEPARATOR---none\n\nsmooth skin",
+    ),
+    # Tags inside the bold markers are stripped first; the first of several verdicts wins
+    (
+        "**<strong>Identify Growths</strong>**: bushy shoots\n\n\n[VERDICT: Gall Disease Present]\n[CONFIDENCE: 60%] [VERDICT: Gall Disease Not Present] [CONFIDENCE: 5%]",
+        "[VERDICT: Gall Disease Present]\n[CONFIDENCE: 60%]---SEPARATOR---<h4>Identify Growths</h4>\n\nbushy shoots",
+    ),
+    (
+        "No structured answer.",
+        "[VERDICT: Error] [CONFIDENCE: 0%]---SEPARATOR---No structured answer.",
+    ),
+])
+def test_format_analysis(analysis_text, expected):
+    assert format_analysis(analysis_text) == expected